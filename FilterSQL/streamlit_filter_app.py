@@ -4,6 +4,7 @@ import tempfile
 import os
 import chardet
 import io
+from instrumentation import count, render_streamlit_panel, timed
 
 st.set_page_config(layout="wide")
 st.title("🚀 High-Performance SQL on Large Files with DuckDB")
@@ -30,6 +31,7 @@ if delimiter_option == "Custom":
 
 # ---------------------- FILE HANDLING ----------------------
 
+@timed("upload.detect_encoding")
 def detect_encoding(uploaded_file):
     raw_data = uploaded_file.read(100000)
     result = chardet.detect(raw_data)
@@ -39,6 +41,7 @@ def detect_encoding(uploaded_file):
         encoding = "utf-8"
     return encoding
 
+@timed("upload.save_to_disk")
 def save_to_disk(uploaded_file):
     suffix = os.path.splitext(uploaded_file.name)[1]
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, mode="wb") as tmp:
@@ -108,7 +111,9 @@ if table1_path or table2_path:
     if st.button("Run SQL Query"):
         try:
             full_query = query_prefix + "\n" + user_query
-            result = con.execute(full_query).df()
+            with timed("duckdb.execute"):
+                result = con.execute(full_query).df()
+            count("duckdb.rows_returned", len(result))
             st.session_state["query_result"] = result
             st.success("✅ Query executed successfully!")
             st.dataframe(result.head(1000), use_container_width=True)
@@ -144,3 +149,5 @@ if table1_path or table2_path:
 
 else:
     st.warning("👆 Upload at least one file to begin.")
+
+render_streamlit_panel()
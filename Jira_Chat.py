@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
 import requests
-import base64
-import matplotlib.pyplot as plt
+import io
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import plotly.graph_objects as go
+from instrumentation import count, render_streamlit_panel, timed
 
 # -----------------------
 # Jira API Configuration
@@ -17,6 +23,24 @@ CLIENT_CERT_PATH = "jira.crt"
 # Optional: Custom field id for Story Points in your Jira
 STORY_POINT_FIELD = "customfield_10016"
 
+# Sprint custom field id, and the field names Jira uses for these in changelogs
+SPRINT_FIELD = "customfield_10020"
+SPRINT_CHANGELOG_FIELD = "Sprint"
+STORY_POINT_CHANGELOG_FIELD = "Story Points"
+
+DONE_STATUSES = ['done', 'closed', 'resolved']
+
+# Per-issue changelog cache, refreshed only when the issue's `updated` changes
+CHANGELOG_CACHE_DIR = ".jira_changelog_cache"
+SEARCH_PAGE_SIZE = 100
+MAX_WORKERS = 8
+
+# Chart figures are memoized on their data; bound how many are kept per process
+FIGURE_CACHE_SIZE = 64
+
+# Rendered export files cached per process (keyed on the exported data)
+EXPORT_CACHE_SIZE = 32
+
 
 # -----------------------
 # Jira API Helper Functions
@@ -28,10 +52,11 @@ def get_auth_header():
         "Accept": "application/json"
     }
 
-def jira_get(url):
+def jira_get(url, params=None):
     headers = get_auth_header()
     full_url = f"{JIRA_BASE_URL}{url}"
-    response = requests.get(full_url, headers=headers, cert=CLIENT_CERT_PATH)
+    with timed("jira.request"):
+        response = requests.get(full_url, headers=headers, params=params, cert=CLIENT_CERT_PATH)
     response.raise_for_status()
     return response.json()
 
@@ -43,10 +68,237 @@ def get_sprints(board_id):
     result = jira_get(f"/rest/agile/1.0/board/{board_id}/sprint")
     return result.get('values', [])
 
+def get_board_filter_id(board_id):
+    result = jira_get(f"/rest/agile/1.0/board/{board_id}/configuration")
+    return result['filter']['id']
+
 def get_issues_in_sprint(sprint_id):
     result = jira_get(f"/rest/agile/1.0/sprint/{sprint_id}/issue?maxResults=1000")
     return result.get('issues', [])
 
+def search_issues(jql, fields, expand=None):
+    """
+    Return every issue matching `jql` from /rest/api/2/search.
+
+    The first page tells us `total`; the remaining pages are then requested
+    concurrently.
+    """
+    def fetch_page(start_at):
+        params = {'jql': jql, 'fields': ",".join(fields), 'startAt': start_at, 'maxResults': SEARCH_PAGE_SIZE}
+        if expand:
+            params['expand'] = expand
+        return jira_get("/rest/api/2/search", params=params)
+
+    first = fetch_page(0)
+    issues = first.get('issues', [])
+    # The server may cap maxResults below what we asked for
+    page_size = first.get('maxResults') or SEARCH_PAGE_SIZE
+    offsets = range(len(issues), first.get('total', 0), page_size)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for page in executor.map(fetch_page, offsets):
+            issues.extend(page.get('issues', []))
+    return issues
+
+
+# -----------------------
+# Changelog Cache
+# -----------------------
+def changelog_cache_path(issue_key):
+    return os.path.join(CHANGELOG_CACHE_DIR, f"{issue_key}.json")
+
+def load_cached_issue(issue_key, updated):
+    path = changelog_cache_path(issue_key)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        issue = json.load(f)
+    # Entries cached before `created` was fetched are refreshed once
+    fields = issue['fields']
+    return issue if fields.get('updated') == updated and 'created' in fields else None
+
+def save_cached_issue(issue):
+    os.makedirs(CHANGELOG_CACHE_DIR, exist_ok=True)
+    with open(changelog_cache_path(issue['key']), "w") as f:
+        json.dump(issue, f)
+
+def fetch_full_changelog(issue):
+    """Search results may truncate long changelogs; re-read those issues directly."""
+    changelog = issue.get('changelog', {})
+    if changelog.get('total', 0) <= len(changelog.get('histories', [])):
+        return issue
+    full = jira_get(f"/rest/api/2/issue/{issue['key']}", params={'expand': 'changelog', 'fields': 'updated'})
+    issue['changelog'] = full['changelog']
+    return issue
+
+def get_issues_with_changelog(jql):
+    """
+    Issues matching `jql` with their changelogs, served from the per-issue
+    cache where possible. A light search for `updated` decides which issues
+    are stale; only those are fetched with `expand=changelog`, in parallel
+    chunks of keys.
+    """
+    fields = ['summary', 'status', 'created', 'updated', STORY_POINT_FIELD, SPRINT_FIELD]
+    issues = {}
+    stale_keys = []
+    for issue in search_issues(jql, ['updated']):
+        cached = load_cached_issue(issue['key'], issue['fields']['updated'])
+        if cached:
+            issues[issue['key']] = cached
+        else:
+            stale_keys.append(issue['key'])
+    count("changelog_cache.hits", len(issues))
+    count("changelog_cache.misses", len(stale_keys))
+
+    chunks = [stale_keys[i:i + SEARCH_PAGE_SIZE] for i in range(0, len(stale_keys), SEARCH_PAGE_SIZE)]
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        results = executor.map(
+            lambda keys: search_issues(f"key in ({','.join(keys)})", fields, expand='changelog'),
+            chunks
+        )
+        for chunk in results:
+            for issue in executor.map(fetch_full_changelog, chunk):
+                save_cached_issue(issue)
+                issues[issue['key']] = issue
+    return list(issues.values())
+
+
+# -----------------------
+# Sprint Scope Reconstruction
+# -----------------------
+def sprint_candidates_jql(board_id, sprints):
+    """
+    Issues that may have been in any of `sprints`: those in them now, plus
+    board issues updated since the earliest sprint start, which covers issues
+    removed before the sprint closed. The changelog replay decides which were
+    actually in each sprint.
+    """
+    sprint_ids = ",".join(str(sprint['id']) for sprint in sprints)
+    earliest_start = min(parse_jira_datetime(sprint['startDate']) for sprint in sprints)
+    # JQL dates are in the user's time zone; a day of margin makes the date safe to use in UTC
+    since = earliest_start - timedelta(days=1)
+    return (
+        f'sprint in ({sprint_ids}) OR '
+        f'(filter = {get_board_filter_id(board_id)} AND updated >= "{since:%Y/%m/%d}")'
+    )
+
+def parse_jira_datetime(value):
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+
+def parse_sprint_ids(value):
+    return {int(sprint_id) for sprint_id in re.findall(r'\d+', value or '')}
+
+def current_sprint_ids(issue):
+    sprint_ids = set()
+    for sprint in issue['fields'].get(SPRINT_FIELD) or []:
+        if isinstance(sprint, dict):
+            sprint_ids.add(sprint['id'])
+        else:
+            # Jira Server returns the sprint as a serialized string
+            match = re.search(r'\bid=(\d+)', sprint)
+            if match:
+                sprint_ids.add(int(match.group(1)))
+    return sprint_ids
+
+def index_field_changes(issue):
+    """Chronological (timestamp, changelog item) lists keyed by field name."""
+    changes = {}
+    for history in issue.get('changelog', {}).get('histories', []):
+        changed_at = parse_jira_datetime(history['created'])
+        for item in history['items']:
+            changes.setdefault(item['field'], []).append((changed_at, item))
+    for field_changes in changes.values():
+        field_changes.sort(key=lambda change: change[0])
+    return changes
+
+def value_at(changes, current_value, at, from_key, to_key):
+    """Value of a field at time `at`, replaying its changelog entries."""
+    before = [item for changed_at, item in changes if changed_at <= at]
+    if before:
+        return before[-1][to_key]
+    if changes:
+        return changes[0][1][from_key]
+    return current_value
+
+def sprint_ids_at(issue, changes, at):
+    # An issue created inside a running sprint has no Sprint changelog entry
+    # for it, so it must not count as being in any sprint before it existed
+    created = issue['fields'].get('created')
+    if created and at < parse_jira_datetime(created):
+        return set()
+    changes = changes.get(SPRINT_CHANGELOG_FIELD)
+    if not changes:
+        return current_sprint_ids(issue)
+    return parse_sprint_ids(value_at(changes, None, at, 'from', 'to'))
+
+def story_points_at(issue, changes, at):
+    current = issue['fields'].get(STORY_POINT_FIELD) or 0
+    changes = changes.get(STORY_POINT_CHANGELOG_FIELD)
+    if not changes:
+        return current
+    value = value_at(changes, current, at, 'fromString', 'toString')
+    return float(value) if value else 0
+
+def status_at(issue, changes, at):
+    current = issue['fields']['status']['name']
+    return value_at(changes.get('status', []), current, at, 'fromString', 'toString')
+
+def reconstruct_sprint_scope(sprint, issues, changes_by_key):
+    """
+    Committed-at-start and delivered-at-end for one sprint from changelogs.
+
+    Issues are counted as committed if they were in the sprint when it
+    started, with the story points they had at that moment; delivered if they
+    were still in the sprint and in a done status when it completed (or now,
+    for an active sprint). `changes_by_key` maps issue key to the output of
+    `index_field_changes`, so changelogs are parsed once for all sprints.
+    """
+    start = parse_jira_datetime(sprint['startDate'])
+    end_value = sprint.get('completeDate')
+    end = parse_jira_datetime(end_value) if end_value else datetime.now(timezone.utc)
+
+    committed = delivered = scope_added = scope_removed = 0
+    issue_rows = []
+    for issue in issues:
+        changes = changes_by_key[issue['key']]
+        in_at_start = sprint['id'] in sprint_ids_at(issue, changes, start)
+        in_at_end = sprint['id'] in sprint_ids_at(issue, changes, end)
+        if not (in_at_start or in_at_end):
+            continue
+
+        points_at_start = story_points_at(issue, changes, start) if in_at_start else 0
+        points_at_end = story_points_at(issue, changes, end) if in_at_end else 0
+        done_at_end = in_at_end and status_at(issue, changes, end).lower() in DONE_STATUSES
+
+        committed += points_at_start
+        if done_at_end:
+            delivered += points_at_end
+        if in_at_end and not in_at_start:
+            scope_added += points_at_end
+        if in_at_start and not in_at_end:
+            scope_removed += points_at_start
+
+        issue_rows.append({
+            'Issue Key': issue['key'],
+            'Summary': issue['fields'].get('summary', ''),
+            'Status': issue['fields']['status']['name'],
+            'Story Points': issue['fields'].get(STORY_POINT_FIELD, 0) or 0,
+            'Points At Start': points_at_start,
+            'Points At End': points_at_end,
+            'Added Mid-Sprint': in_at_end and not in_at_start,
+            'Removed Mid-Sprint': in_at_start and not in_at_end,
+            'Delivered': done_at_end,
+            'Sprint': sprint['name']
+        })
+
+    return {
+        'sprint_name': sprint['name'],
+        'committed': committed,
+        'delivered': delivered,
+        'scope_added': scope_added,
+        'scope_removed': scope_removed,
+        'issues': issue_rows
+    }
+
 
 # -----------------------
 # Reporting Functions
@@ -55,41 +307,114 @@ def generate_sprint_report(sprint_data):
     df = pd.DataFrame(sprint_data)
     return df
 
-def plot_velocity_chart(sprint_reports):
-    plt.figure(figsize=(10, 5))
-    sprint_names = [report['sprint_name'] for report in sprint_reports]
-    committed_values = [report['committed'] for report in sprint_reports]
-    delivered_values = [report['delivered'] for report in sprint_reports]
-
-    plt.bar(sprint_names, committed_values, color='skyblue', label='Committed')
-    plt.bar(sprint_names, delivered_values, color='green', label='Delivered')
+def chart_data(sprint_reports):
+    """Hashable (sprint, committed, delivered) rows used as the figure cache key."""
+    return tuple((r['sprint_name'], r['committed'], r['delivered']) for r in sprint_reports)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def build_velocity_figure(rows):
+    sprint_names = [r[0] for r in rows]
+    committed_values = [r[1] for r in rows]
+    delivered_values = [r[2] for r in rows]
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=sprint_names, y=committed_values, name='Committed', marker_color='skyblue'))
+    fig.add_trace(go.Bar(x=sprint_names, y=delivered_values, name='Delivered', marker_color='green'))
+    fig.update_layout(
+        title="Velocity Chart",
+        xaxis_title="Sprints",
+        yaxis_title="Story Points",
+        barmode='overlay',
+        height=500
+    )
+    return fig
 
-    plt.ylabel("Story Points")
-    plt.xlabel("Sprints")
-    plt.title("Velocity Chart")
-    plt.legend()
-    st.pyplot(plt)
+def plot_velocity_chart(sprint_reports):
+    st.plotly_chart(build_velocity_figure(chart_data(sprint_reports)), use_container_width=True)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def build_say_do_figure(rows):
+    sprints = [r[0] for r in rows]
+    say_do_ratio = [(d / c if c > 0 else 0) for _, c, d in rows]
+
+    fig = go.Figure(go.Scatter(
+        x=sprints,
+        y=say_do_ratio,
+        mode='lines+markers',
+        line=dict(color='blue')
+    ))
+    fig.update_layout(
+        title="Say-Do Ratio per Sprint",
+        xaxis_title="Sprints",
+        yaxis=dict(title="Say-Do Ratio", range=[0, max(say_do_ratio, default=0) + 0.5]),
+        height=400
+    )
+    return fig
 
 def generate_say_do_chart(sprint_reports):
-    sprints = [r['sprint_name'] for r in sprint_reports]
-    say_do_ratio = [
-        (r['delivered'] / r['committed'] if r['committed'] > 0 else 0)
-        for r in sprint_reports
-    ]
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(sprints, say_do_ratio, marker='o', linestyle='-', color='blue')
-    plt.ylabel("Say-Do Ratio")
-    plt.xlabel("Sprints")
-    plt.title("Say-Do Ratio per Sprint")
-    plt.ylim(0, max(say_do_ratio) + 0.5)
-    st.pyplot(plt)
-
-def to_csv_download_link(df, filename):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">📥 Download {filename}</a>'
-    return href
+    st.plotly_chart(build_say_do_figure(chart_data(sprint_reports)), use_container_width=True)
+
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+@st.cache_data(max_entries=EXPORT_CACHE_SIZE, show_spinner=False)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode()
+
+def data_fingerprint(*dfs):
+    """Cheap content hash of DataFrames, to tell whether a prepared export is still current."""
+    return tuple(int(pd.util.hash_pandas_object(df, index=False).sum()) for df in dfs)
+
+def on_demand_download(file_name, mime, build, fingerprint):
+    """
+    "Prepare" button that builds the file with `build()` only once clicked,
+    followed by its download button. The prepared state is kept in
+    st.session_state with the `fingerprint` of the data, so the rerun
+    triggered by the download click keeps showing the download, while a
+    different selection asks for Prepare again instead of rebuilding the file.
+    """
+    prepared = st.session_state.setdefault('prepared_exports', {})
+    if prepared.get(file_name) != fingerprint:
+        if not st.button(f"📦 Prepare {file_name}", key=f"prepare_{file_name}"):
+            return
+        prepared[file_name] = fingerprint
+    st.download_button(
+        f"📥 Download {file_name}",
+        data=build(),
+        file_name=file_name,
+        mime=mime,
+        key=f"download_{file_name}"
+    )
+
+def csv_download_button(df, filename):
+    """CSV download of a DataFrame, serialized (and cached) only after Prepare is clicked."""
+    on_demand_download(filename, "text/csv", lambda: to_csv_bytes(df), data_fingerprint(df))
+
+@st.cache_data(max_entries=EXPORT_CACHE_SIZE, show_spinner=False)
+def combined_export_bytes(issue_df, summary_df, export_format):
+    """All selected sprints in one file: a single issues table, plus a summary sheet for XLSX."""
+    buffer = io.BytesIO()
+    if export_format == 'CSV':
+        issue_df.to_csv(buffer, index=False)
+    elif export_format == 'Parquet':
+        issue_df.to_parquet(buffer, index=False)
+    else:
+        with pd.ExcelWriter(buffer) as writer:
+            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            issue_df.to_excel(writer, sheet_name='Issues', index=False)
+    return buffer.getvalue()
+
+def combined_export(issue_df, summary_df, basename):
+    export_format = st.selectbox("Export format:", list(EXPORT_FORMATS.keys()))
+    extension, mime = EXPORT_FORMATS[export_format]
+    on_demand_download(
+        f"{basename}.{extension}", mime,
+        lambda: combined_export_bytes(issue_df, summary_df, export_format),
+        data_fingerprint(issue_df, summary_df)
+    )
 
 
 # -----------------------
@@ -111,49 +436,30 @@ def main():
         board_id = board_options[board_name]
 
         sprints = get_sprints(board_id)
-        sprint_options = {sprint['name']: sprint['id'] for sprint in sprints}
+        sprint_options = {sprint['name']: sprint for sprint in sprints}
 
         selected_sprints = st.multiselect("Select Sprint(s):", list(sprint_options.keys()))
+        not_started = [name for name in selected_sprints if not sprint_options[name].get('startDate')]
+        if not_started:
+            st.warning(f"Skipping sprints that have not started: {', '.join(not_started)}")
+            selected_sprints = [name for name in selected_sprints if name not in not_started]
 
         if selected_sprints:
-            sprint_reports = []
+            with st.spinner("Fetching issue changelogs..."):
+                issues = get_issues_with_changelog(
+                    sprint_candidates_jql(board_id, [sprint_options[name] for name in selected_sprints])
+                )
+            changes_by_key = {issue['key']: index_field_changes(issue) for issue in issues}
 
+            sprint_reports = []
             for sprint_name in selected_sprints:
-                sprint_id = sprint_options[sprint_name]
-                issues = get_issues_in_sprint(sprint_id)
-
-                committed = 0
-                delivered = 0
-                issue_rows = []
-
-                for issue in issues:
-                    fields = issue['fields']
-                    story_points = fields.get(STORY_POINT_FIELD, 0) or 0
-                    status = fields['status']['name']
-
-                    committed += story_points
-                    if status.lower() in ['done', 'closed', 'resolved']:
-                        delivered += story_points
-
-                    issue_rows.append({
-                        'Issue Key': issue['key'],
-                        'Summary': fields.get('summary', ''),
-                        'Status': status,
-                        'Story Points': story_points,
-                        'Sprint': sprint_name
-                    })
-
-                sprint_reports.append({
-                    'sprint_name': sprint_name,
-                    'committed': committed,
-                    'delivered': delivered,
-                    'issues': issue_rows
-                })
+                report = reconstruct_sprint_scope(sprint_options[sprint_name], issues, changes_by_key)
+                sprint_reports.append(report)
 
                 st.subheader(f"📋 Sprint Report: {sprint_name}")
-                df = generate_sprint_report(issue_rows)
+                df = generate_sprint_report(report['issues'])
                 st.dataframe(df)
-                st.markdown(to_csv_download_link(df, f"{sprint_name}_report.csv"), unsafe_allow_html=True)
+                csv_download_button(df, f"{sprint_name}_report.csv")
 
             # Velocity Chart
             st.subheader("📈 Velocity Chart")
@@ -170,14 +476,21 @@ def main():
                     'Sprint': r['sprint_name'],
                     'Committed Story Points': r['committed'],
                     'Delivered Story Points': r['delivered'],
+                    'Scope Added': r['scope_added'],
+                    'Scope Removed': r['scope_removed'],
                     'Say-Do Ratio': round(r['delivered'] / r['committed'], 2) if r['committed'] else 0
                 }
                 for r in sprint_reports
             ])
 
             st.dataframe(summary_df)
-            st.markdown(to_csv_download_link(summary_df, "Sprint_Summary_Report.csv"), unsafe_allow_html=True)
+            csv_download_button(summary_df, "Sprint_Summary_Report.csv")
+
+            st.subheader("📦 Combined Export (All Selected Sprints)")
+            issue_df = generate_sprint_report([row for r in sprint_reports for row in r['issues']])
+            combined_export(issue_df, summary_df, "Sprint_Report")
 
 
 if __name__ == "__main__":
     main()
+    render_streamlit_panel()
@@ -1,6 +1,7 @@
 import snowflake.connector
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
+from instrumentation import summary, timed
 
 # ---- CONFIGURATION ----
 SNOWFLAKE_USER = 'your_username'
@@ -27,18 +28,20 @@ def get_private_key():
 
 try:
     # Connect to Snowflake using private key
-    conn = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        account=SNOWFLAKE_ACCOUNT,
-        private_key=get_private_key(),
-        warehouse=SNOWFLAKE_WAREHOUSE,
-        database=SNOWFLAKE_DATABASE,
-        schema=SNOWFLAKE_SCHEMA
-    )
+    with timed("snowflake.connect"):
+        conn = snowflake.connector.connect(
+            user=SNOWFLAKE_USER,
+            account=SNOWFLAKE_ACCOUNT,
+            private_key=get_private_key(),
+            warehouse=SNOWFLAKE_WAREHOUSE,
+            database=SNOWFLAKE_DATABASE,
+            schema=SNOWFLAKE_SCHEMA
+        )
 
     # Run a simple query to test
     cursor = conn.cursor()
-    cursor.execute("SELECT CURRENT_USER(), CURRENT_VERSION()")
+    with timed("snowflake.query"):
+        cursor.execute("SELECT CURRENT_USER(), CURRENT_VERSION()")
     for row in cursor:
         print("✅ Connected to Snowflake as:", row[0])
         print("🔢 Snowflake version:", row[1])
@@ -48,3 +51,5 @@ try:
 except Exception as e:
     print("❌ Connection failed.")
     print("Error:", str(e))
+
+print(summary())
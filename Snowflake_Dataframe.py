@@ -2,6 +2,7 @@ import snowflake.connector
 import pandas as pd
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
+from instrumentation import count, summary, timed
 
 # ---- CONFIGURATION ----
 SNOWFLAKE_USER = 'your_username'
@@ -28,14 +29,15 @@ def get_private_key():
 
 # ---- CONNECT AND FETCH DATA ----
 try:
-    conn = snowflake.connector.connect(
-        user=SNOWFLAKE_USER,
-        account=SNOWFLAKE_ACCOUNT,
-        private_key=get_private_key(),
-        warehouse=SNOWFLAKE_WAREHOUSE,
-        database=SNOWFLAKE_DATABASE,
-        schema=SNOWFLAKE_SCHEMA
-    )
+    with timed("snowflake.connect"):
+        conn = snowflake.connector.connect(
+            user=SNOWFLAKE_USER,
+            account=SNOWFLAKE_ACCOUNT,
+            private_key=get_private_key(),
+            warehouse=SNOWFLAKE_WAREHOUSE,
+            database=SNOWFLAKE_DATABASE,
+            schema=SNOWFLAKE_SCHEMA
+        )
 
     print("✅ Connected to Snowflake")
 
@@ -43,7 +45,9 @@ try:
     query = "SELECT * FROM your_table_name LIMIT 100"  # Replace with your actual query
 
     # Fetch into DataFrame
-    df = pd.read_sql(query, conn)
+    with timed("snowflake.query"):
+        df = pd.read_sql(query, conn)
+    count("snowflake.rows_fetched", len(df))
 
     # Preview
     print("📄 Sample Data:")
@@ -58,3 +62,5 @@ try:
 except Exception as e:
     print("❌ Connection or fetch failed.")
     print("Error:", str(e))
+
+print(summary())
@@ -0,0 +1,189 @@
+"""
+Shared timing and counters for the scripts in this repo.
+
+    from instrumentation import timed, count
+
+    with timed("jira.request"):
+        response = requests.get(...)
+
+    @timed("ollama.generate")
+    def generate(...): ...
+
+    count("jira.issues_created", 50)
+
+Stats are kept per process. Set INSTRUMENTATION_JSONL to append every timed
+call as a JSON line (a simple trace, written in batches of TRACE_FLUSH_LINES
+and at exit, or call flush_trace()), and INSTRUMENTATION_PROM to write a
+Prometheus text file at exit (or call write_prometheus() yourself). Streamlit
+apps can call render_streamlit_panel() to show the numbers in the sidebar.
+
+This file is copied verbatim to FilterSQL/instrumentation.py and into
+jira_test_case_generator.zip so those stay self-contained. Change all three
+together; `cmp instrumentation.py FilterSQL/instrumentation.py` and
+`unzip -p jira_test_case_generator.zip instrumentation.py | cmp - instrumentation.py`
+should both print nothing.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+JSONL_PATH = os.environ.get("INSTRUMENTATION_JSONL")
+PROMETHEUS_PATH = os.environ.get("INSTRUMENTATION_PROM")
+TRACE_FLUSH_LINES = 200
+
+_lock = threading.Lock()
+_timers = {}    # name -> {'calls', 'errors', 'total_s', 'max_s'}
+_counters = {}  # name -> value
+_trace_lines = []
+
+# Trace file I/O has its own lock, so timed calls never wait on the disk
+_trace_lock = threading.Lock()
+_trace_file = None
+
+
+def record(name, seconds, error=False):
+    line = None
+    if JSONL_PATH:
+        line = json.dumps({
+            'ts': time.time(),
+            'name': name,
+            'duration_s': round(seconds, 6),
+            'error': error,
+            'thread': threading.current_thread().name
+        }) + "\n"
+    with _lock:
+        stats = _timers.setdefault(name, {'calls': 0, 'errors': 0, 'total_s': 0.0, 'max_s': 0.0})
+        stats['calls'] += 1
+        stats['errors'] += int(error)
+        stats['total_s'] += seconds
+        stats['max_s'] = max(stats['max_s'], seconds)
+        if line:
+            _trace_lines.append(line)
+        full = len(_trace_lines) >= TRACE_FLUSH_LINES
+    if full:
+        flush_trace()
+
+
+def flush_trace():
+    """Append buffered trace lines to INSTRUMENTATION_JSONL, opening it once per process."""
+    global _trace_file
+    with _lock:
+        lines = _trace_lines[:]
+        _trace_lines.clear()
+    if not lines:
+        return
+    with _trace_lock:
+        if _trace_file is None:
+            _trace_file = open(JSONL_PATH, "a")
+        _trace_file.write("".join(lines))
+        _trace_file.flush()
+
+
+def count(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+class timed:
+    """Time a block (`with timed(name):`) or every call of a function (`@timed(name)`)."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self._started, error=exc_type is not None)
+        return False
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def snapshot():
+    """Current timers and counters as a list of row dicts, slowest total first."""
+    with _lock:
+        rows = [
+            {'name': name, 'kind': 'timer', **stats,
+             'avg_s': stats['total_s'] / stats['calls'] if stats['calls'] else 0.0}
+            for name, stats in _timers.items()
+        ]
+        rows.sort(key=lambda row: row['total_s'], reverse=True)
+        rows += [{'name': name, 'kind': 'counter', 'calls': value} for name, value in sorted(_counters.items())]
+    return rows
+
+
+def summary():
+    lines = []
+    for row in snapshot():
+        if row['kind'] == 'timer':
+            lines.append(f"{row['name']:<32} {row['calls']:>7} calls {row['total_s']:>9.3f}s total "
+                         f"{row['avg_s']:>8.3f}s avg {row['max_s']:>8.3f}s max {row['errors']:>4} errors")
+        else:
+            lines.append(f"{row['name']:<32} {row['calls']:>7}")
+    return "\n".join(lines)
+
+
+def to_prometheus():
+    def label(name):
+        return '{name="%s"}' % name.replace("\\", "\\\\").replace('"', '\\"')
+
+    with _lock:
+        timers = dict(_timers)
+        counters = dict(_counters)
+    lines = [
+        "# TYPE instrumentation_calls_total counter",
+        *(f"instrumentation_calls_total{label(n)} {s['calls']}" for n, s in timers.items()),
+        "# TYPE instrumentation_errors_total counter",
+        *(f"instrumentation_errors_total{label(n)} {s['errors']}" for n, s in timers.items()),
+        "# TYPE instrumentation_seconds_total counter",
+        *(f"instrumentation_seconds_total{label(n)} {s['total_s']:.6f}" for n, s in timers.items()),
+        "# TYPE instrumentation_seconds_max gauge",
+        *(f"instrumentation_seconds_max{label(n)} {s['max_s']:.6f}" for n, s in timers.items()),
+        "# TYPE instrumentation_count_total counter",
+        *(f"instrumentation_count_total{label(n)} {v}" for n, v in counters.items()),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path=None):
+    path = path or PROMETHEUS_PATH
+    if not path:
+        return
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(to_prometheus())
+    os.replace(tmp_path, path)
+
+
+atexit.register(write_prometheus)
+atexit.register(flush_trace)
+
+
+def render_streamlit_panel():
+    """Collapsible sidebar table of the process-wide stats, with a Prometheus download."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("⏱ Instrumentation"):
+        rows = snapshot()
+        if not rows:
+            st.caption("No calls recorded yet.")
+            return
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        st.download_button(
+            "📥 Prometheus metrics",
+            data=to_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+            key="instrumentation_prometheus"
+        )
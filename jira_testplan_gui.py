@@ -6,22 +6,65 @@ JIRA_USER = "your-email@example.com"
 JIRA_TOKEN = "your_api_token"
 PROJECT_KEY = "ABC"
 TEST_INDICATOR_FIELD = "customfield_12345"  # Field for 'Indicator Testing Required'
+TEST_CASES_PER_STORY = 3
+BULK_CREATE_SIZE = 50      # Jira accepts at most 50 issues per /issue/bulk call
+MAX_WORKERS = 4            # Concurrent Jira requests
+MAX_RETRIES = 5            # Retries on 429/503 before giving up
+HTTP_POOL_SIZE = 16        # Connections kept open to Jira, shared by all worker threads
+TRACEABILITY_FORMATS = ("xlsx", "csv")  # Also "parquet" (needs pyarrow); the CSV is a live checkpoint
+JOURNAL_PATH = "data/testplan_journal.sqlite"
+SEARCH_PAGE_SIZE = 100     # Stories requested per search page
+STORY_FIELDS = "summary"   # Only what the generator uses; the key is always returned
 
 
 # gui_input.py
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 
-def get_user_input():
+def run_gui(generate):
+    """
+    Tk front end that keeps the window responsive: `generate(mode, value,
+    on_created)` runs on a worker thread and reports created issue counts,
+    which the UI thread picks up from a queue.
+    """
+    updates = queue.Queue()
+
+    def worker(mode_val, value_val):
+        try:
+            generate(mode_val, value_val, lambda count: updates.put(("created", count)))
+            updates.put(("done", None))
+        except Exception as e:
+            updates.put(("error", e))
+
     def submit():
         mode_val = mode.get()
         value_val = value.get()
         if not mode_val or not value_val:
             messagebox.showwarning("Input Required", "Please select a mode and enter a name.")
-        else:
-            root.mode = mode_val
-            root.value = value_val
-            root.destroy()
+            return
+        button.config(state=tk.DISABLED)
+        root.created = 0
+        status.config(text="Generating...")
+        threading.Thread(target=worker, args=(mode_val, value_val), daemon=True).start()
+        root.after(200, poll)
+
+    def poll():
+        while not updates.empty():
+            kind, payload = updates.get()
+            if kind == "created":
+                root.created += payload
+                status.config(text=f"{root.created} issues created")
+            elif kind == "done":
+                button.config(state=tk.NORMAL)
+                messagebox.showinfo("Test Plan Generator", f"Done: {root.created} issues created.")
+                return
+            else:
+                button.config(state=tk.NORMAL)
+                messagebox.showerror("Test Plan Generator", str(payload))
+                return
+        root.after(200, poll)
 
     root = tk.Tk()
     root.title("Test Plan Generator")
@@ -34,30 +77,157 @@ def get_user_input():
     value = tk.Entry(root)
     value.grid(row=1, column=1)
 
-    tk.Button(root, text="Generate", command=submit).grid(row=2, columnspan=2)
+    button = tk.Button(root, text="Generate", command=submit)
+    button.grid(row=2, columnspan=2)
+    status = tk.Label(root, text="")
+    status.grid(row=3, columnspan=2)
     root.mainloop()
 
-    return root.mode, root.value
-
 
 # jira_utils.py
+from concurrent.futures import ThreadPoolExecutor
 from jira import JIRA
+from requests.adapters import HTTPAdapter
 from config import *
+from instrumentation import timed
 
-def connect_to_jira():
-    return JIRA(server=JIRA_URL, basic_auth=(JIRA_USER, JIRA_TOKEN))
+def connect_to_jira(pool_size=HTTP_POOL_SIZE):
+    """One client whose connection pool is sized for all worker threads sharing it."""
+    jira = JIRA(server=JIRA_URL, basic_auth=(JIRA_USER, JIRA_TOKEN))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    jira._session.mount("https://", adapter)
+    jira._session.mount("http://", adapter)
+    return jira
 
-def get_target_user_stories(jira, mode, value):
+def build_story_jql(mode, value):
     if mode == 'release':
         jql = f'project = {PROJECT_KEY} AND fixVersion = "{value}" AND issuetype = Story AND "{TEST_INDICATOR_FIELD}" = "Yes"'
     elif mode == 'sprint':
         jql = f'project = {PROJECT_KEY} AND Sprint = "{value}" AND issuetype = Story AND "{TEST_INDICATOR_FIELD}" = "Yes"'
     else:
         raise ValueError("Invalid mode. Choose 'release' or 'sprint'")
-    return jira.search_issues(jql, maxResults=100)
+    # A stable order keeps startAt pages from overlapping or skipping stories
+    return jql + " ORDER BY key"
+
+def iter_target_user_stories(jira, mode, value):
+    """
+    Yield every matching story, page by page. The first page gives the total;
+    the remaining pages are then fetched concurrently and yielded in order, so
+    callers can start working before the search has finished.
+    """
+    jql = build_story_jql(mode, value)
+    search = timed("jira.search")(jira.search_issues)
+    first = search(jql, startAt=0, maxResults=SEARCH_PAGE_SIZE, fields=STORY_FIELDS)
+    yield from first
+    # The server may return fewer than we asked for per page
+    page_size = len(first) or SEARCH_PAGE_SIZE
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pages = [
+            executor.submit(search, jql, startAt=start, maxResults=page_size, fields=STORY_FIELDS)
+            for start in range(len(first), first.total, page_size)
+        ]
+        for page in pages:
+            yield from page.result()
+
+def get_target_user_stories(jira, mode, value):
+    return list(iter_target_user_stories(jira, mode, value))
+
+
+# journal.py
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+class Journal:
+    """
+    SQLite record of every planned issue creation, keyed by a deterministic
+    idempotency key. Entries are written as 'pending' before the API call and
+    'created' (with the Jira key) after it, so a rerun only creates what is
+    still missing.
+    """
+
+    # Keys per IN (...) lookup, below SQLite's bound-parameter limit
+    QUERY_CHUNK_SIZE = 500
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS creations (
+                idem_key TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                issue_id TEXT,
+                issue_key TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def _select(self, columns, status, idem_keys):
+        """Rows of `status` among `idem_keys`, looked up by primary key in chunks."""
+        idem_keys = list(idem_keys)
+        rows = []
+        with self._lock:
+            for i in range(0, len(idem_keys), self.QUERY_CHUNK_SIZE):
+                chunk = idem_keys[i:i + self.QUERY_CHUNK_SIZE]
+                rows += self._conn.execute(
+                    f"SELECT {columns} FROM creations "
+                    f"WHERE status = ? AND idem_key IN ({','.join('?' * len(chunk))})",
+                    [status, *chunk]
+                ).fetchall()
+        return rows
+
+    def created(self, idem_keys):
+        """Map of idempotency key -> (issue_id, issue_key) for finished creations."""
+        rows = self._select("idem_key, issue_id, issue_key", 'created', idem_keys)
+        return {key: (issue_id, issue_key) for key, issue_id, issue_key in rows}
+
+    def pending(self, idem_keys):
+        return [key for (key,) in self._select("idem_key", 'pending', idem_keys)]
+
+    def mark_pending(self, idem_keys):
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO creations (idem_key, status, updated_at) VALUES (?, 'pending', ?)",
+                [(key, now) for key in idem_keys]
+            )
+
+    def mark_created(self, entries):
+        """`entries` is an iterable of (idem_key, issue_id, issue_key)."""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO creations (idem_key, status, issue_id, issue_key, updated_at) "
+                "VALUES (?, 'created', ?, ?, ?)",
+                [(key, issue_id, issue_key, now) for key, issue_id, issue_key in entries]
+            )
+
+    def close(self):
+        self._conn.close()
+
+def idempotency_label(idem_key):
+    """Jira label carried by the created issue, used to find it if the journal missed the response."""
+    return "tpgen_" + hashlib.sha1(idem_key.encode()).hexdigest()[:16]
 
 
 # test_plan_utils.py
+import json
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from jira.exceptions import JIRAError
+from config import *
+from journal import idempotency_label
+from instrumentation import count, timed
+
+CreatedIssue = namedtuple('CreatedIssue', ['id', 'key'])
+
 def create_test_plan(jira, name):
     issue_dict = {
         'project': {'key': PROJECT_KEY},
@@ -74,9 +244,9 @@ def create_test_set(jira, story):
     }
     return jira.create_issue(fields=issue_dict)
 
-def create_test_cases(jira, story, count=3):
+def create_test_cases(jira, story, cases_per_story=3):
     test_cases = []
-    for i in range(count):
+    for i in range(cases_per_story):
         test = jira.create_issue(fields={
             'project': {'key': PROJECT_KEY},
             'summary': f"Test Case {i+1} for {story.key}",
@@ -96,66 +266,362 @@ def create_test_execution(jira, test_plan, test_set):
     jira.create_issue_link("Tests", test_set.key, exec_issue.key)
     return exec_issue
 
+def retry_delay(retry_after, attempt):
+    """Seconds to wait from a Retry-After header (seconds or HTTP date), else exponential backoff."""
+    if retry_after:
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+            except (TypeError, ValueError):
+                pass
+    return 2 ** attempt
+
+def post_with_backoff(jira, path, payload):
+    """
+    POST to the Jira REST API, backing off on rate limiting (429) and 503.
+    The client session retries these briefly itself and then raises
+    JIRAError, so the longer, Retry-After aware backoff happens here.
+    """
+    url = jira._get_url(path)
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            with timed(f"jira.post.{path}"):
+                return jira._session.post(url, data=json.dumps(payload)).json()
+        except JIRAError as e:
+            if e.status_code not in (429, 503) or attempt == MAX_RETRIES:
+                raise
+            count("jira.rate_limited")
+            retry_after = e.response.headers.get('Retry-After') if e.response is not None else None
+            time.sleep(retry_delay(retry_after, attempt))
+
+def issue_fields(summary, issue_type):
+    return {
+        'project': {'key': PROJECT_KEY},
+        'summary': summary,
+        'issuetype': {'name': issue_type}
+    }
+
+def link_update(link_type, inward=None, outward=None):
+    """`update` entry that links the new issue at creation time, saving a link call."""
+    link = {'type': {'name': link_type}}
+    if inward:
+        link['inwardIssue'] = {'key': inward}
+    if outward:
+        link['outwardIssue'] = {'key': outward}
+    return {'add': link}
+
+def find_issues_by_label(jira, idem_keys):
+    """Recover issues created by an interrupted run whose response never reached the journal."""
+    labels = {idempotency_label(key): key for key in idem_keys}
+    found = []
+    names = list(labels)
+    for i in range(0, len(names), BULK_CREATE_SIZE):
+        jql = f"labels in ({','.join(names[i:i + BULK_CREATE_SIZE])})"
+        for issue in jira.search_issues(jql, fields='labels', maxResults=False):
+            for label in issue.fields.labels:
+                if label in labels:
+                    found.append((labels[label], issue.id, issue.key))
+    return found
+
+def bulk_create_issues(jira, journal, planned, on_created=None):
+    """
+    Create issues through /rest/api/2/issue/bulk in chunks of BULK_CREATE_SIZE,
+    sending chunks concurrently. `planned` is a list of (idempotency key,
+    issue update); entries already in the journal, or found in Jira by their
+    idempotency label, are not created again. `on_created(count)` is called
+    after each successful chunk. Returns CreatedIssue tuples in input order.
+    """
+    idem_keys = [key for key, _ in planned]
+    journal.mark_created(find_issues_by_label(jira, journal.pending(idem_keys)))
+    existing = journal.created(idem_keys)
+
+    todo = []
+    for key, update in planned:
+        if key not in existing:
+            update['fields']['labels'] = update['fields'].get('labels', []) + [idempotency_label(key)]
+            todo.append((key, update))
+    chunks = [todo[i:i + BULK_CREATE_SIZE] for i in range(0, len(todo), BULK_CREATE_SIZE)]
+
+    def create_chunk(chunk):
+        chunk_keys = [key for key, _ in chunk]
+        journal.mark_pending(chunk_keys)
+        result = post_with_backoff(jira, 'issue/bulk', {'issueUpdates': [update for _, update in chunk]})
+        # Created issues come back in order, skipping the failed elements
+        failed = {error['failedElementNumber'] for error in result.get('errors', [])}
+        succeeded = [key for i, key in enumerate(chunk_keys) if i not in failed]
+        journal.mark_created(
+            (key, issue['id'], issue['key']) for key, issue in zip(succeeded, result['issues'])
+        )
+        count("jira.issues_created", len(result['issues']))
+        if on_created:
+            on_created(len(result['issues']))
+        if failed:
+            raise RuntimeError(f"Bulk issue creation failed: {result['errors']}")
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        list(executor.map(create_chunk, chunks))
+
+    created = journal.created(idem_keys)
+    return [CreatedIssue(*created[key]) for key in idem_keys]
+
+def create_test_plan_once(jira, journal, run_key, name, on_created=None):
+    [test_plan] = bulk_create_issues(jira, journal, [
+        (f"{run_key}|plan", {'fields': issue_fields(name, 'Test Plan')})
+    ], on_created)
+    return test_plan
+
+def create_test_artifacts_bulk(jira, journal, run_key, test_plan, stories,
+                               cases_per_story=TEST_CASES_PER_STORY, on_created=None):
+    """
+    Create a test set, `cases_per_story` linked test cases and a linked
+    execution for every story with three bulk passes, instead of one request
+    per issue and per link. Idempotency keys are derived from `run_key` (the release or
+    sprint) and the story key, so rerunning a failed generation resumes it.
+    Returns (test_sets, test_cases_map, executions) keyed by story key.
+    """
+    test_sets = dict(zip(
+        [story.key for story in stories],
+        bulk_create_issues(jira, journal, [
+            (f"{run_key}|set|{story.key}", {'fields': issue_fields(f"Test Set for {story.key}", 'Test Set')})
+            for story in stories
+        ], on_created)
+    ))
+
+    case_owners = [story.key for story in stories for _ in range(cases_per_story)]
+    cases = bulk_create_issues(jira, journal, [
+        (f"{run_key}|case|{story.key}|{i+1}", {
+            'fields': issue_fields(f"Test Case {i+1} for {story.key}", 'Test'),
+            'update': {'issuelinks': [link_update("Tests", outward=story.key)]}
+        })
+        for story in stories for i in range(cases_per_story)
+    ], on_created)
+    test_cases_map = {story.key: [] for story in stories}
+    for story_key, case in zip(case_owners, cases):
+        test_cases_map[story_key].append(case)
+
+    executions = dict(zip(
+        [story.key for story in stories],
+        bulk_create_issues(jira, journal, [
+            (f"{run_key}|execution|{story.key}", {
+                'fields': issue_fields(f"Execution for {test_sets[story.key].key}", 'Test Execution'),
+                'update': {'issuelinks': [
+                    link_update("Test Plan", inward=test_plan.key),
+                    link_update("Tests", inward=test_sets[story.key].key)
+                ]}
+            })
+            for story in stories
+        ], on_created)
+    ))
+    return test_sets, test_cases_map, executions
 
 # traceability.py
-import pandas as pd
+import csv
+import os
+from openpyxl import Workbook
 
-def export_traceability(user_stories, test_sets, test_cases_map, executions, file_path):
-    rows = []
+TRACEABILITY_COLUMNS = ["User Story", "Test Set", "Test Case", "Execution"]
+
+def traceability_rows(user_stories, test_sets, test_cases_map, executions):
     for story in user_stories:
         tset = test_sets[story.key]
-        cases = test_cases_map[story.key]
         exec = executions[story.key]
-        for tc in cases:
-            rows.append({
-                "User Story": story.key,
-                "Test Set": tset.key,
-                "Test Case": tc.key,
-                "Execution": exec.key
-            })
-    df = pd.DataFrame(rows)
-    df.to_excel(file_path, index=False)
+        for tc in test_cases_map[story.key]:
+            yield [story.key, tset.key, tc.key, exec.key]
+
+class TraceabilityWriter:
+    """
+    Streams traceability rows to `<base_path>.xlsx` / `.csv` / `.parquet` as
+    each batch of stories is created, without holding the report in memory.
+    XLSX uses openpyxl's write-only mode and is complete only after close();
+    the CSV is flushed after every batch, so it doubles as a checkpoint while
+    generation is still running. Parquet needs pyarrow.
+    """
+
+    def __init__(self, base_path, formats=("xlsx",)):
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        self.paths = {fmt: f"{base_path}.{fmt}" for fmt in formats}
+        self._workbook = self._sheet = self._csv_file = self._csv = self._parquet = None
+
+        if "xlsx" in formats:
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("Traceability")
+            self._sheet.append(TRACEABILITY_COLUMNS)
+        if "csv" in formats:
+            self._csv_file = open(self.paths["csv"], "w", newline="")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(TRACEABILITY_COLUMNS)
+        if "parquet" in formats:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._schema = pa.schema([(column, pa.string()) for column in TRACEABILITY_COLUMNS])
+            self._parquet = pq.ParquetWriter(self.paths["parquet"], self._schema)
+
+    def write(self, user_stories, test_sets, test_cases_map, executions):
+        rows = list(traceability_rows(user_stories, test_sets, test_cases_map, executions))
+        if self._sheet is not None:
+            for row in rows:
+                self._sheet.append(row)
+        if self._csv is not None:
+            self._csv.writerows(rows)
+            self._csv_file.flush()
+        if self._parquet is not None and rows:
+            import pyarrow as pa
+            self._parquet.write_table(pa.Table.from_pylist(
+                [dict(zip(TRACEABILITY_COLUMNS, row)) for row in rows], schema=self._schema
+            ))
+
+    def close(self):
+        if self._workbook is not None:
+            self._workbook.save(self.paths["xlsx"])
+        if self._csv_file is not None:
+            self._csv_file.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
+def export_traceability(user_stories, test_sets, test_cases_map, executions, file_path):
+    base_path, extension = os.path.splitext(file_path)
+    with TraceabilityWriter(base_path, formats=(extension.lstrip(".") or "xlsx",)) as writer:
+        writer.write(user_stories, test_sets, test_cases_map, executions)
 
-# main.py
-from gui_input import get_user_input
-from jira_utils import connect_to_jira, get_target_user_stories
-from test_plan_utils import create_test_plan, create_test_set, create_test_cases, create_test_execution
-from traceability import export_traceability
 
-def main():
-    mode, value = get_user_input()
-    jira = connect_to_jira()
-    stories = get_target_user_stories(jira, mode, value)
+# generator.py
+from itertools import islice
+from jira_utils import iter_target_user_stories
+from test_plan_utils import create_test_plan_once, create_test_artifacts_bulk
+from traceability import TraceabilityWriter
+from config import BULK_CREATE_SIZE, PROJECT_KEY, TRACEABILITY_FORMATS
 
-    plan_name = f"Test Plan for {value}"
-    test_plan = create_test_plan(jira, plan_name)
+def generate_test_plan(jira, journal, mode, value, formats=TRACEABILITY_FORMATS, on_created=None):
+    """Create (or resume) the test plan for one release or sprint and write its traceability export."""
+    run_key = f"{PROJECT_KEY}|{mode}|{value}"
 
-    test_sets = {}
-    test_cases_map = {}
-    executions = {}
+    plan_name = f"Test Plan for {value}"
+    test_plan = create_test_plan_once(jira, journal, run_key, plan_name, on_created)
+
+    traceability = TraceabilityWriter(f"data/traceability_{value.replace(' ', '_')}", formats)
+    # Create artifacts for each batch of stories as soon as the search yields it
+    story_iter = iter_target_user_stories(jira, mode, value)
+    with traceability:
+        while batch := list(islice(story_iter, BULK_CREATE_SIZE)):
+            sets, cases, execs = create_test_artifacts_bulk(
+                jira, journal, run_key, test_plan, batch, on_created=on_created
+            )
+            traceability.write(batch, sets, cases, execs)
+    return traceability.paths
+
+
+# cli.py
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from jira_utils import connect_to_jira
+from journal import Journal
+from generator import generate_test_plan
+from config import JOURNAL_PATH, TRACEABILITY_FORMATS
+from instrumentation import summary
+
+class Progress:
+    """Thread-safe count of created issues with overall throughput."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.created = 0
+        self.started = time.monotonic()
+
+    def add(self, target, count):
+        with self._lock:
+            self.created += count
+            print(f"[{target}] +{count} issues | {self.created} total | {self.rate():.1f} issues/s", flush=True)
+
+    def rate(self):
+        return self.created / max(time.monotonic() - self.started, 1e-9)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Jira test plans without the GUI.")
+    parser.add_argument("--release", action="append", default=[], help="Release (fixVersion) name; repeatable")
+    parser.add_argument("--sprint", action="append", default=[], help="Sprint name; repeatable")
+    parser.add_argument("--parallel", type=int, default=2, help="Releases/sprints processed at once")
+    parser.add_argument("--formats", default=",".join(TRACEABILITY_FORMATS),
+                        help="Traceability outputs, comma separated: xlsx,csv,parquet")
+    args = parser.parse_args(argv)
+    if not args.release and not args.sprint:
+        parser.error("give at least one --release or --sprint")
+    return args
+
+def cli_main(argv=None):
+    args = parse_args(argv)
+    targets = [("release", name) for name in args.release] + [("sprint", name) for name in args.sprint]
+    formats = tuple(fmt.strip() for fmt in args.formats.split(",") if fmt.strip())
 
-    for story in stories:
-        tset = create_test_set(jira, story)
-        test_sets[story.key] = tset
+    jira = connect_to_jira()
+    journal = Journal(JOURNAL_PATH)
+    progress = Progress()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        futures = {
+            executor.submit(
+                generate_test_plan, jira, journal, mode, value, formats,
+                lambda count, target=f"{mode} {value}": progress.add(target, count)
+            ): f"{mode} {value}"
+            for mode, value in targets
+        }
+        for future in as_completed(futures):
+            try:
+                paths = future.result()
+                print(f"[{futures[future]}] done -> {', '.join(paths.values())}")
+            except Exception as e:
+                failed += 1
+                print(f"[{futures[future]}] failed: {e} (rerun to resume)")
+    journal.close()
+
+    print(f"{progress.created} issues created in {time.monotonic() - progress.started:.1f}s "
+          f"({progress.rate():.1f} issues/s), {failed} of {len(targets)} targets failed")
+    print(summary())
+    return 1 if failed else 0
 
-        tcs = create_test_cases(jira, story)
-        test_cases_map[story.key] = tcs
 
-        exec = create_test_execution(jira, test_plan, tset)
-        executions[story.key] = exec
+# main.py
+import sys
+from gui_input import run_gui
+from jira_utils import connect_to_jira
+from journal import Journal
+from generator import generate_test_plan
+from cli import cli_main
+from config import JOURNAL_PATH
+
+def generate_from_gui(mode, value, on_created):
+    jira = connect_to_jira()
+    journal = Journal(JOURNAL_PATH)
+    try:
+        generate_test_plan(jira, journal, mode, value, on_created=on_created)
+    finally:
+        journal.close()
 
-    export_traceability(
-        stories, test_sets, test_cases_map, executions,
-        f"data/traceability_{value.replace(' ', '_')}.xlsx"
-    )
+def main():
+    # With arguments, run headless (e.g. `python main.py --release 1.4 --release 1.5`)
+    if len(sys.argv) > 1:
+        sys.exit(cli_main(sys.argv[1:]))
+    run_gui(generate_from_gui)
 
 if __name__ == "__main__":
     main()
 
+# instrumentation.py
+# (shared module from the repository root; copy it next to these files)
+
 
 # requirements.txt
 jira
-pandas
 openpyxl
 tk
+# pyarrow  (optional, for Parquet traceability export)
@@ -2,8 +2,20 @@ import streamlit as st
 import pandas as pd
 import requests
 import base64
-import matplotlib.pyplot as plt
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import duckdb
 import plotly.graph_objects as go
+from instrumentation import count, render_streamlit_panel, timed
 
 # -----------------------
 # Jira Configuration
@@ -16,6 +28,33 @@ JIRA_PASSWORD = "your-password-or-api-token"         # Use API token if you're u
 # Custom field ID for story points (update this if yours is different)
 STORY_POINT_FIELD = "customfield_10016"
 
+# Custom field ID for the sprint field (update this if yours is different)
+SPRINT_FIELD = "customfield_10020"
+
+# Local issue store used by the incremental sync (one JSON file per board)
+SYNC_STORE_DIR = ".jira_sync"
+SYNC_PAGE_SIZE = 100
+# JQL only has minute precision, so re-read a small overlap on every sync
+SYNC_OVERLAP = timedelta(minutes=5)
+# How long the UI reuses a board sync across reruns before asking Jira again
+SYNC_TTL_SECONDS = 5 * 60
+# Deleted issues and issues that left the board filter are swept this often, with a
+# key-only search of the whole board; Full Resync also clears them
+RECONCILE_INTERVAL = timedelta(days=1)
+
+DONE_STATUSES = ['done', 'closed', 'resolved']
+ISSUE_COLUMNS = ['Sprint ID', 'Issue Key', 'Summary', 'Status', 'Status Category', 'Story Points', 'Created']
+
+# Local analytics store with one row of metrics per sprint, for every board
+ANALYTICS_DB = "sprint_analytics.duckdb"
+SNAPSHOT_INTERVAL_SECONDS = 60 * 60
+
+# Chart figures are memoized on their data; bound how many are kept per process
+FIGURE_CACHE_SIZE = 64
+
+# Rendered export files cached per process (keyed on the exported data)
+EXPORT_CACHE_SIZE = 32
+
 # -----------------------
 # Helper Functions
 # -----------------------
@@ -28,10 +67,11 @@ def get_auth_header():
         "Accept": "application/json"
     }
 
-def jira_get(url):
+def jira_get(url, params=None):
     headers = get_auth_header()
     full_url = f"{JIRA_BASE_URL}{url}"
-    response = requests.get(full_url, headers=headers)
+    with timed("jira.request"):
+        response = requests.get(full_url, headers=headers, params=params)
     response.raise_for_status()
     return response.json()
 
@@ -39,14 +79,307 @@ def get_boards(project_key):
     result = jira_get(f"/rest/agile/1.0/board?projectKeyOrId={project_key}")
     return result.get('values', [])
 
+def get_agile_values(url, params=None):
+    """Follow startAt/isLast paging of an agile endpoint and return all values."""
+    values = []
+    params = dict(params or {})
+    while True:
+        params['startAt'] = len(values)
+        result = jira_get(url, params=params)
+        values.extend(result.get('values', []))
+        if result.get('isLast', True) or not result.get('values'):
+            return values
+
+def get_all_boards():
+    return get_agile_values("/rest/agile/1.0/board")
+
 def get_sprints(board_id):
-    result = jira_get(f"/rest/agile/1.0/board/{board_id}/sprint")
-    return result.get('values', [])
+    return get_agile_values(f"/rest/agile/1.0/board/{board_id}/sprint")
 
 def get_issues_in_sprint(sprint_id):
     result = jira_get(f"/rest/agile/1.0/sprint/{sprint_id}/issue?maxResults=1000")
     return result.get('issues', [])
 
+# -----------------------
+# Incremental Issue Sync
+# -----------------------
+
+def get_board_filter_id(board_id):
+    result = jira_get(f"/rest/agile/1.0/board/{board_id}/configuration")
+    return result['filter']['id']
+
+def search_issues(jql, fields):
+    """Page through /rest/api/2/search and return every matching issue."""
+    issues = []
+    start_at = 0
+    while True:
+        result = jira_get("/rest/api/2/search", params={
+            'jql': jql,
+            'fields': ",".join(fields),
+            'startAt': start_at,
+            'maxResults': SYNC_PAGE_SIZE
+        })
+        page = result.get('issues', [])
+        issues.extend(page)
+        start_at += len(page)
+        if not page or start_at >= result.get('total', 0):
+            return issues
+
+def store_path(board_id):
+    return os.path.join(SYNC_STORE_DIR, f"board_{board_id}.json")
+
+def load_issue_store(board_id):
+    path = store_path(board_id)
+    if not os.path.exists(path):
+        return {'last_sync': None, 'issues': {}}
+    with open(path) as f:
+        return json.load(f)
+
+def save_issue_store(board_id, store):
+    os.makedirs(SYNC_STORE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=SYNC_STORE_DIR, suffix=".tmp", delete=False) as f:
+        json.dump(store, f)
+    os.replace(f.name, store_path(board_id))
+
+@st.cache_resource
+def board_store_lock(board_id):
+    """One lock per board, shared by the snapshot thread and every session's sync."""
+    return threading.Lock()
+
+@lru_cache(maxsize=1)
+def get_user_timezone():
+    """Time zone Jira uses to read dates in JQL: the API user's profile setting."""
+    return ZoneInfo(jira_get("/rest/api/2/myself")['timeZone'])
+
+def sync_watermark(store):
+    """Latest `updated` among stored issues, in the API user's time zone, or None."""
+    updated = [
+        datetime.strptime(issue['fields']['updated'], "%Y-%m-%dT%H:%M:%S.%f%z")
+        for issue in store['issues'].values()
+        if issue['fields'].get('updated')
+    ]
+    return max(updated).astimezone(get_user_timezone()) if updated else None
+
+def sync_board_issues(board_id, full=False):
+    """
+    Bring the local store for a board up to date and return it.
+
+    Only issues updated since the newest `updated` already stored are
+    requested, so the cost of a refresh follows the number of changed issues,
+    not the size of the board history. Once per RECONCILE_INTERVAL a key-only
+    search of the board filter drops issues that were deleted or left the
+    board. `full=True` discards the store and re-downloads it.
+    """
+    with board_store_lock(board_id):
+        return _sync_board_issues(board_id, full)
+
+def _sync_board_issues(board_id, full):
+    store = {'last_sync': None, 'issues': {}} if full else load_issue_store(board_id)
+    board_jql = f"filter = {get_board_filter_id(board_id)}"
+
+    jql = board_jql
+    since = sync_watermark(store)
+    if since:
+        # Jira reads JQL dates in the user's time zone, at minute precision
+        jql += f' AND updated >= "{since - SYNC_OVERLAP:%Y/%m/%d %H:%M}"'
+
+    fields = ['summary', 'status', 'created', 'updated', STORY_POINT_FIELD, SPRINT_FIELD]
+    changed = search_issues(jql, fields)
+    for issue in changed:
+        store['issues'][issue['key']] = issue
+    count("jira.issues_synced", len(changed))
+
+    now = datetime.now()
+    last_reconcile = store.get('last_reconcile')
+    reconcile_due = since and (
+        not last_reconcile or now - datetime.fromisoformat(last_reconcile) >= RECONCILE_INTERVAL
+    )
+    removed = []
+    if reconcile_due:
+        live_keys = {issue['key'] for issue in search_issues(board_jql, ['key'])}
+        removed = [key for key in store['issues'] if key not in live_keys]
+        for key in removed:
+            del store['issues'][key]
+        count("jira.issues_removed", len(removed))
+    if not since or reconcile_due:
+        # A download of the whole board is as fresh as a sweep
+        store['last_reconcile'] = now.isoformat(timespec='seconds')
+
+    store['last_sync'] = now.isoformat(timespec='seconds')
+    if not since or changed or reconcile_due:
+        save_issue_store(board_id, store)
+    return store
+
+@st.cache_data(ttl=SYNC_TTL_SECONDS, show_spinner="Syncing issues from Jira...")
+def cached_board_issues(board_id):
+    """Board sync shared by reruns, so widget interactions do not call Jira or rewrite the store."""
+    return sync_board_issues(board_id)
+
+def issue_sprint_ids(issue):
+    sprint_ids = set()
+    for sprint in issue['fields'].get(SPRINT_FIELD) or []:
+        if isinstance(sprint, dict):
+            sprint_ids.add(sprint['id'])
+        else:
+            # Jira Server returns the sprint as a serialized string
+            match = re.search(r'\bid=(\d+)', sprint)
+            if match:
+                sprint_ids.add(int(match.group(1)))
+    return sprint_ids
+
+# -----------------------
+# Sprint Analytics Store
+# -----------------------
+
+def build_sprint_table(sprints):
+    df = pd.DataFrame([{
+        'Sprint ID': s['id'],
+        'Sprint': s['name'],
+        'State': s.get('state', ''),
+        'Start': s.get('startDate'),
+        'End': s.get('completeDate') or s.get('endDate')
+    } for s in sprints], columns=['Sprint ID', 'Sprint', 'State', 'Start', 'End'])
+    df['Start'] = pd.to_datetime(df['Start'], utc=True, format='ISO8601')
+    df['End'] = pd.to_datetime(df['End'], utc=True, format='ISO8601')
+    return df
+
+def compute_sprint_metrics(issue_df, sprint_df):
+    """
+    Per-sprint committed (in the sprint when it started), delivered, scope
+    added after the sprint started and points carried over into a later
+    sprint, for every sprint in `sprint_df`. An issue that moved on is only
+    delivered in the last sprint it was in, since its status is the current one.
+    """
+    df = issue_df.merge(sprint_df[['Sprint ID', 'Start']], on='Sprint ID', how='left')
+    points = df['Story Points']
+    carried_over = df.groupby('Issue Key')['Start'].transform('max') > df['Start']
+    added = df['Created'] > df['Start']
+
+    metrics = (
+        df.assign(
+            Committed=points.where(~added, 0),
+            Delivered=points.where(df['Done'] & ~carried_over, 0),
+            **{
+                'Scope Added': points.where(added, 0),
+                'Carry Over': points.where(carried_over, 0)
+            }
+        )
+        .groupby('Sprint ID')
+        .agg(
+            Committed=('Committed', 'sum'),
+            Delivered=('Delivered', 'sum'),
+            **{
+                'Scope Added': ('Scope Added', 'sum'),
+                'Carry Over': ('Carry Over', 'sum')
+            }
+        )
+        .reset_index()
+    )
+    metrics = sprint_df.merge(metrics, on='Sprint ID', how='left')
+    value_columns = ['Committed', 'Delivered', 'Scope Added', 'Carry Over']
+    metrics[value_columns] = metrics[value_columns].fillna(0)
+    metrics['Say-Do Ratio'] = (
+        metrics['Delivered'] / metrics['Committed'].where(metrics['Committed'] > 0)
+    ).round(2).fillna(0)
+    return metrics
+
+def ensure_metrics_table(con):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS sprint_metrics (
+            board_id BIGINT,
+            board_name VARCHAR,
+            sprint_id BIGINT,
+            sprint_name VARCHAR,
+            state VARCHAR,
+            start_date TIMESTAMPTZ,
+            end_date TIMESTAMPTZ,
+            committed DOUBLE,
+            delivered DOUBLE,
+            scope_added DOUBLE,
+            carry_over DOUBLE,
+            say_do DOUBLE,
+            snapshot_at TIMESTAMPTZ
+        )
+    """)
+
+def snapshot_board_metrics(board_id, board_name):
+    """Sync a board incrementally and replace its rows in the analytics store."""
+    # Sprints first: Kanban boards fail here, before their issue history is downloaded
+    sprint_df = build_sprint_table(get_sprints(board_id))
+    store = sync_board_issues(board_id)
+    issue_df = build_issue_table(store['issues'].values(), dict(zip(sprint_df['Sprint ID'], sprint_df['Sprint'])))
+    snapshot = compute_sprint_metrics(issue_df, sprint_df)
+
+    with timed("duckdb.snapshot_write"), duckdb.connect(ANALYTICS_DB) as con:
+        ensure_metrics_table(con)
+        con.register('snapshot', snapshot)
+        con.execute("BEGIN TRANSACTION")
+        con.execute("DELETE FROM sprint_metrics WHERE board_id = ?", [board_id])
+        con.execute("""
+            INSERT INTO sprint_metrics
+            SELECT ?, ?, "Sprint ID", "Sprint", "State", "Start", "End",
+                   "Committed", "Delivered", "Scope Added", "Carry Over", "Say-Do Ratio", now()
+            FROM snapshot
+        """, [board_id, board_name])
+        con.execute("COMMIT")
+    return len(snapshot)
+
+def snapshot_all_boards():
+    for board in get_all_boards():
+        try:
+            snapshot_board_metrics(board['id'], board['name'])
+        except requests.HTTPError as e:
+            # Kanban boards have no sprints; skip boards we cannot report on
+            print(f"Skipping board {board['name']}: {e}")
+        except Exception as e:
+            # One broken board must not stop the snapshot of the others
+            print(f"Snapshot of board {board['name']} failed: {e!r}")
+
+def run_snapshot_job(interval_seconds=SNAPSHOT_INTERVAL_SECONDS):
+    while True:
+        try:
+            snapshot_all_boards()
+        except Exception as e:
+            print(f"Sprint metrics snapshot failed: {e}")
+        time.sleep(interval_seconds)
+
+@st.cache_resource
+def start_snapshot_job():
+    """Start the snapshot thread once per Streamlit server process."""
+    thread = threading.Thread(target=run_snapshot_job, daemon=True, name="sprint-snapshot")
+    thread.start()
+    return thread
+
+@st.cache_data(ttl=60)
+def load_stored_boards():
+    with duckdb.connect(ANALYTICS_DB) as con:
+        ensure_metrics_table(con)
+        return con.execute(
+            "SELECT DISTINCT board_id, board_name FROM sprint_metrics ORDER BY board_name"
+        ).df()
+
+@st.cache_data(ttl=60)
+def load_sprint_metrics(board_ids, last_n_sprints):
+    """Latest `last_n_sprints` started sprints per board, oldest first."""
+    with timed("duckdb.query"), duckdb.connect(ANALYTICS_DB) as con:
+        ensure_metrics_table(con)
+        return con.execute("""
+            SELECT * FROM (
+                SELECT *, row_number() OVER (PARTITION BY board_id ORDER BY start_date DESC) AS recency
+                FROM sprint_metrics
+                WHERE list_contains(?, board_id) AND start_date IS NOT NULL
+            )
+            WHERE recency <= ?
+            ORDER BY start_date, board_name
+        """, [list(board_ids), last_n_sprints]).df()
+
+def stored_metrics_to_reports(metrics_df, prefix_board=False):
+    return [{
+        'sprint_name': f"{row['board_name']} / {row['sprint_name']}" if prefix_board else row['sprint_name'],
+        'committed': row['committed'],
+        'delivered': row['delivered']
+    } for row in metrics_df.to_dict('records')]
+
 # -----------------------
 # Reporting Functions
 # -----------------------
@@ -54,23 +387,73 @@ def get_issues_in_sprint(sprint_id):
 def generate_sprint_report(sprint_data):
     return pd.DataFrame(sprint_data)
 
-# def plot_velocity_chart(sprint_reports):
-#     plt.figure(figsize=(10, 5))
-#     sprint_names = [r['sprint_name'] for r in sprint_reports]
-#     committed = [r['committed'] for r in sprint_reports]
-#     delivered = [r['delivered'] for r in sprint_reports]
-
-#     plt.bar(sprint_names, committed, color='lightblue', label='Committed')
-#     plt.bar(sprint_names, delivered, color='green', label='Delivered')
-#     plt.ylabel("Story Points")
-#     plt.title("Velocity Chart")
-#     plt.legend()
-#     st.pyplot(plt)
-
-def plot_velocity_chart(sprint_reports):
-    sprint_names = [r['sprint_name'] for r in sprint_reports]
-    committed = [r['committed'] for r in sprint_reports]
-    delivered = [r['delivered'] for r in sprint_reports]
+def build_issue_table(issues, sprint_names):
+    """
+    Normalize raw Jira issues into one typed table with a row per (sprint, issue).
+
+    `sprint_names` maps sprint id -> sprint name for the sprints to keep; its
+    order becomes the order of the `Sprint` categorical.
+    """
+    df = pd.DataFrame([{
+        'Sprint ID': list(issue_sprint_ids(issue)),
+        'Issue Key': issue['key'],
+        'Summary': issue['fields'].get('summary', ''),
+        'Status': issue['fields']['status']['name'],
+        'Status Category': issue['fields']['status'].get('statusCategory', {}).get('key', ''),
+        'Story Points': issue['fields'].get(STORY_POINT_FIELD) or 0,
+        'Created': issue['fields'].get('created')
+    } for issue in issues], columns=ISSUE_COLUMNS)
+
+    df = df.explode('Sprint ID')
+    df = df[df['Sprint ID'].isin(list(sprint_names))]
+    df['Done'] = (df['Status Category'] == 'done') | df['Status'].str.lower().isin(DONE_STATUSES)
+    df = df.astype({
+        'Sprint ID': 'int64',
+        'Issue Key': 'string',
+        'Summary': 'string',
+        'Status': 'category',
+        'Status Category': 'category',
+        'Story Points': 'float64'
+    })
+    df['Created'] = pd.to_datetime(df['Created'], utc=True, format='ISO8601')
+    df.insert(0, 'Sprint', pd.Categorical(
+        df['Sprint ID'].map(sprint_names),
+        categories=list(dict.fromkeys(sprint_names.values())),
+        ordered=True
+    ))
+    return df.reset_index(drop=True)
+
+def summarize_sprints(issue_df):
+    """Committed, delivered and say-do per sprint as grouped column operations."""
+    summary = (
+        issue_df
+        .assign(Delivered=issue_df['Story Points'].where(issue_df['Done'], 0))
+        .groupby('Sprint', observed=False)
+        .agg(Committed=('Story Points', 'sum'), Delivered=('Delivered', 'sum'))
+        .reset_index()
+    )
+    summary['Sprint'] = summary['Sprint'].astype('string')
+    summary['Say-Do Ratio'] = (
+        summary['Delivered'] / summary['Committed'].where(summary['Committed'] > 0)
+    ).round(2).fillna(0)
+    return summary
+
+def summary_to_reports(summary_df):
+    return [{
+        'sprint_name': row['Sprint'],
+        'committed': row['Committed'],
+        'delivered': row['Delivered']
+    } for row in summary_df.to_dict('records')]
+
+def chart_data(sprint_reports):
+    """Hashable (sprint, committed, delivered) rows used as the figure cache key."""
+    return tuple((r['sprint_name'], r['committed'], r['delivered']) for r in sprint_reports)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def build_velocity_figure(rows):
+    sprint_names = [r[0] for r in rows]
+    committed = [r[1] for r in rows]
+    delivered = [r[2] for r in rows]
 
     fig = go.Figure()
 
@@ -98,13 +481,17 @@ def plot_velocity_chart(sprint_reports):
         hovermode='x unified'
     )
 
-    st.plotly_chart(fig, use_container_width=True)
-    
-def plot_combined_chart(sprint_reports):
-    sprint_names = [r['sprint_name'] for r in sprint_reports]
-    committed = [r['committed'] for r in sprint_reports]
-    delivered = [r['delivered'] for r in sprint_reports]
-    say_do = [round((r['delivered'] / r['committed']), 2) if r['committed'] else 0 for r in sprint_reports]
+    return fig
+
+def plot_velocity_chart(sprint_reports):
+    st.plotly_chart(build_velocity_figure(chart_data(sprint_reports)), use_container_width=True)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def build_combined_figure(rows):
+    sprint_names = [r[0] for r in rows]
+    committed = [r[1] for r in rows]
+    delivered = [r[2] for r in rows]
+    say_do = [round((d / c), 2) if c else 0 for _, c, d in rows]
 
     fig = go.Figure()
 
@@ -157,30 +544,131 @@ def plot_combined_chart(sprint_reports):
         height=500
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
+def plot_combined_chart(sprint_reports):
+    st.plotly_chart(build_combined_figure(chart_data(sprint_reports)), use_container_width=True)
+
+@st.cache_resource(max_entries=FIGURE_CACHE_SIZE)
+def build_say_do_figure(rows):
+    sprints = [r[0] for r in rows]
+    ratios = [(d / c) if c > 0 else 0 for _, c, d in rows]
+
+    fig = go.Figure(go.Scatter(
+        x=sprints,
+        y=ratios,
+        mode='lines+markers',
+        marker_color='blue',
+        hovertemplate='Sprint: %{x}<br>Ratio: %{y:.2f}<extra></extra>'
+    ))
+    fig.update_layout(
+        title="Say-Do Ratio per Sprint",
+        yaxis=dict(title="Ratio", range=[0, max(ratios, default=0) + 0.5]),
+        height=400
+    )
+    return fig
 
 def generate_say_do_chart(sprint_reports):
-    sprints = [r['sprint_name'] for r in sprint_reports]
-    ratios = [(r['delivered'] / r['committed']) if r['committed'] > 0 else 0 for r in sprint_reports]
-
-    plt.figure(figsize=(10, 4))
-    plt.plot(sprints, ratios, marker='o', color='blue')
-    plt.title("Say-Do Ratio per Sprint")
-    plt.ylabel("Ratio")
-    plt.ylim(0, max(ratios) + 0.5)
-    st.pyplot(plt)
+    st.plotly_chart(build_say_do_figure(chart_data(sprint_reports)), use_container_width=True)
+
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'XLSX': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+}
+
+@st.cache_data(max_entries=EXPORT_CACHE_SIZE, show_spinner=False)
+def to_csv_bytes(df):
+    return df.to_csv(index=False).encode()
+
+def data_fingerprint(*dfs):
+    """Cheap content hash of DataFrames, to tell whether a prepared export is still current."""
+    return tuple(int(pd.util.hash_pandas_object(df, index=False).sum()) for df in dfs)
+
+def on_demand_download(file_name, mime, build, fingerprint):
+    """
+    "Prepare" button that builds the file with `build()` only once clicked,
+    followed by its download button. The prepared state is kept in
+    st.session_state with the `fingerprint` of the data, so the rerun
+    triggered by the download click keeps showing the download, while a
+    different selection asks for Prepare again instead of rebuilding the file.
+    """
+    prepared = st.session_state.setdefault('prepared_exports', {})
+    if prepared.get(file_name) != fingerprint:
+        if not st.button(f"📦 Prepare {file_name}", key=f"prepare_{file_name}"):
+            return
+        prepared[file_name] = fingerprint
+    st.download_button(
+        f"📥 Download {file_name}",
+        data=build(),
+        file_name=file_name,
+        mime=mime,
+        key=f"download_{file_name}"
+    )
 
-def to_csv_download_link(df, filename):
-    csv = df.to_csv(index=False)
-    b64 = base64.b64encode(csv.encode()).decode()
-    return f'<a href="data:file/csv;base64,{b64}" download="{filename}">📥 Download {filename}</a>'
+def csv_download_button(df, filename):
+    """CSV download of a DataFrame, serialized (and cached) only after Prepare is clicked."""
+    on_demand_download(filename, "text/csv", lambda: to_csv_bytes(df), data_fingerprint(df))
+
+@st.cache_data(max_entries=EXPORT_CACHE_SIZE, show_spinner=False)
+def combined_export_bytes(issue_df, summary_df, export_format):
+    """All selected sprints in one file: a single issues table, plus a summary sheet for XLSX."""
+    buffer = io.BytesIO()
+    if export_format == 'CSV':
+        issue_df.to_csv(buffer, index=False)
+    elif export_format == 'Parquet':
+        issue_df.to_parquet(buffer, index=False)
+    else:
+        with pd.ExcelWriter(buffer) as writer:
+            summary_df.to_excel(writer, sheet_name='Summary', index=False)
+            issue_df.to_excel(writer, sheet_name='Issues', index=False)
+    return buffer.getvalue()
+
+def combined_export(issue_df, summary_df, basename):
+    export_format = st.selectbox("Export format:", list(EXPORT_FORMATS.keys()))
+    extension, mime = EXPORT_FORMATS[export_format]
+    on_demand_download(
+        f"{basename}.{extension}", mime,
+        lambda: combined_export_bytes(issue_df, summary_df, export_format),
+        data_fingerprint(issue_df, summary_df)
+    )
 
 # -----------------------
 # Streamlit App UI
 # -----------------------
 
+def historical_dashboard():
+    st.title("📚 Historical Velocity")
+
+    boards_df = load_stored_boards()
+    if boards_df.empty:
+        st.info("No sprint snapshots stored yet. The background snapshot job is collecting them.")
+        return
+
+    board_map = dict(zip(boards_df['board_name'], boards_df['board_id']))
+    selected_boards = st.multiselect("Select Board(s):", list(board_map.keys()), default=list(board_map.keys())[:1])
+    last_n_sprints = st.slider("Sprints per board:", min_value=5, max_value=100, value=50)
+    if not selected_boards:
+        return
+
+    metrics_df = load_sprint_metrics(tuple(board_map[b] for b in selected_boards), last_n_sprints)
+    sprint_reports = stored_metrics_to_reports(metrics_df, prefix_board=len(selected_boards) > 1)
+
+    st.subheader("📈 Velocity Chart")
+    plot_velocity_chart(sprint_reports)
+
+    st.subheader("📈 Sprint Statistics (Committed vs Delivered + Say-Do Ratio)")
+    plot_combined_chart(sprint_reports)
+
+    st.subheader("📊 Sprint Metrics")
+    st.dataframe(metrics_df.drop(columns=['recency']), use_container_width=True)
+
 def main():
+    start_snapshot_job()
+    if st.sidebar.radio("View:", ["Sprint Report", "Historical Velocity"]) == "Historical Velocity":
+        historical_dashboard()
+        return
+
     st.title("📊 Jira Sprint Reporting Tool")
 
     project_key = st.text_input("Enter Jira Project Code/Name:")
@@ -195,48 +683,30 @@ def main():
         board_name = st.selectbox("Select Board:", list(board_map.keys()))
         board_id = board_map[board_name]
 
+        if st.sidebar.button("🔄 Full Resync"):
+            sync_board_issues(board_id, full=True)
+            cached_board_issues.clear()
+        store = cached_board_issues(board_id)
+        st.sidebar.caption(f"{len(store['issues'])} issues cached, last sync {store['last_sync']}")
+
         sprints = get_sprints(board_id)
         sprint_map = {s['name']: s['id'] for s in sprints}
         selected_sprints = st.multiselect("Select Sprint(s):", list(sprint_map.keys()))
 
         if selected_sprints:
-            sprint_reports = []
-
-            for sprint_name in selected_sprints:
-                sprint_id = sprint_map[sprint_name]
-                issues = get_issues_in_sprint(sprint_id)
-
-                committed, delivered = 0, 0
-                issue_rows = []
-
-                for issue in issues:
-                    fields = issue['fields']
-                    story_points = fields.get(STORY_POINT_FIELD, 0) or 0
-                    status = fields['status']['name']
-
-                    committed += story_points
-                    if status.lower() in ['done', 'closed', 'resolved']:
-                        delivered += story_points
-
-                    issue_rows.append({
-                        'Issue Key': issue['key'],
-                        'Summary': fields.get('summary', ''),
-                        'Status': status,
-                        'Story Points': story_points,
-                        'Sprint': sprint_name
-                    })
-
-                sprint_reports.append({
-                    'sprint_name': sprint_name,
-                    'committed': committed,
-                    'delivered': delivered,
-                    'issues': issue_rows
-                })
+            issue_df = build_issue_table(
+                store['issues'].values(),
+                {sprint_map[name]: name for name in selected_sprints}
+            )
+            summary_df = summarize_sprints(issue_df)
+            sprint_reports = summary_to_reports(summary_df)
 
+            report_columns = ['Issue Key', 'Summary', 'Status', 'Story Points', 'Sprint']
+            for sprint_name, df in issue_df.groupby('Sprint', observed=False, sort=True):
                 st.subheader(f"📋 Sprint Report: {sprint_name}")
-                df = generate_sprint_report(issue_rows)
+                df = df[report_columns].reset_index(drop=True)
                 st.dataframe(df)
-                st.markdown(to_csv_download_link(df, f"{sprint_name}_report.csv"), unsafe_allow_html=True)
+                csv_download_button(df, f"{sprint_name}_report.csv")
 
             # Charts
             st.subheader("📈 Velocity Chart")
@@ -250,30 +720,16 @@ def main():
 
             # Summary Table
             st.subheader("📊 Summary Table")
-            summary_df = pd.DataFrame([{
-                'Sprint': r['sprint_name'],
-                'Committed': r['committed'],
-                'Delivered': r['delivered'],
-                'Say-Do Ratio': round(r['delivered'] / r['committed'], 2) if r['committed'] else 0
-            } for r in sprint_reports])
-
             st.dataframe(summary_df)
-            st.markdown(to_csv_download_link(summary_df, "Summary_Report.csv"), unsafe_allow_html=True)
+            csv_download_button(summary_df, "Summary_Report.csv")
 
-            ##########################################################################
+            st.subheader("📦 Combined Export (All Selected Sprints)")
+            export_columns = ['Sprint', 'Issue Key', 'Summary', 'Status', 'Status Category', 'Story Points', 'Done']
+            combined_export(issue_df[export_columns], summary_df, "Sprint_Report")
 
-            editable_data = []
+            ##########################################################################
 
-            for r in sprint_reports:
-                editable_data.append({
-                    'Sprint': r['sprint_name'],
-                    'Committed': r['committed'],
-                    'Delivered': r['delivered'],
-                    'Say-Do Ratio': round(r['delivered'] / r['committed'], 2) if r['committed'] else 0,
-                    'Correction Comment': ''
-                })
-            
-            editable_df = pd.DataFrame(editable_data)
+            editable_df = summary_df.assign(**{'Correction Comment': ''})
             
             st.subheader("✏️ Edit Committed/Delivered Story Points (Optional)")
             edited_df = st.data_editor(
@@ -314,4 +770,9 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    # `python jiratest.py snapshot` refreshes the analytics store once (e.g. from cron)
+    if sys.argv[1:] == ["snapshot"]:
+        snapshot_all_boards()
+    else:
+        main()
+        render_streamlit_panel()